@@ -4,23 +4,301 @@ Run this script on your local machine with internet access
 
 Requirements:
 pip install yfinance pandas numpy
+pip install numba    # optional, compiles the backtest loop to native code
+pip install pyarrow  # optional, enables the on-disk download cache
+pip install scipy    # optional, root-finds the drag calibration
 
 Synthetic TQQQ is built from QQQ daily returns * 3x minus daily drag
 (expense ratio + leveraged borrowing costs). The drag is calibrated against
 real TQQQ in the 2010-2026 overlap period so the simulation matches reality.
 """
 
+import os
+import time
+
 import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
+try:
+    from scipy.optimize import brentq
+except ImportError:
+    brentq = None
+
+from utils._njit import njit, prange, HAVE_NUMBA
+
+# Explicit kernel signatures so numba compiles at import (against the warm
+# disk cache) instead of on the first backtest call. The input arrays are
+# declared readonly because prepare_data hands out zero-copy pandas views.
+if HAVE_NUMBA:
+    from numba import types
+    _F8_RO = types.Array(types.float64, 1, 'C', readonly=True)
+    _B1_RO = types.Array(types.boolean, 1, 'C', readonly=True)
+    _RUN_STRATEGY_SIG = types.Tuple(
+        (types.float64[::1], types.int32[::1], types.int8[::1], types.float64)
+    )(_B1_RO, _B1_RO, _F8_RO, types.int64, types.float64)
+    _SMA_RUNNING_SIG = types.float64[::1](_F8_RO, types.int64)
+else:
+    _RUN_STRATEGY_SIG = None
+    _SMA_RUNNING_SIG = None
+
+@njit(_RUN_STRATEGY_SIG, cache=True)
+def _run_strategy(buy_sig, sell_sig, tqqq, start, initial_capital):
+    """
+    Per-day signal/execution loop, compiled with numba when available.
+
+    Takes the precomputed buy/sell signal masks (raw elementwise
+    comparisons, no path dependency) plus TQQQ prices, and returns the
+    daily portfolio values, a compact trade log (day index + type code,
+    0=BUY / 1=SELL), and the max drawdown as a fraction (tracked with a
+    running peak inside the loop, saving the separate post-loop passes).
+    The human-readable trade dicts are rebuilt in Python afterwards - only
+    a few hundred entries vs. thousands of loop iterations. `start` is the
+    first bar with a valid SMA; everything before it sits in cash at
+    initial_capital.
+    """
+    n = len(tqqq)
+    portfolio_values = np.empty(n, dtype=np.float64)
+    trade_idx = np.empty(2 * n, dtype=np.int32)
+    trade_type = np.empty(2 * n, dtype=np.int8)
+    n_trades = 0
+
+    position = 0  # 0 = cash, 1 = invested in TQQQ
+    cash = initial_capital
+    shares = 0.0
+    peak = initial_capital
+    min_dd = 0.0
+
+    # SMA warm-up region: no signals possible, portfolio stays in cash.
+    # Known-constant, so fill it in one vectorized step.
+    portfolio_values[:start] = initial_capital
+
+    for i in range(start, n):
+        # Buy signal: QQQ price crosses above QQQ buy_level -> Buy TQQQ
+        if position == 0 and buy_sig[i]:
+            if cash > 0:
+                shares = cash / tqqq[i]  # Buy TQQQ shares
+                position = 1
+                trade_idx[n_trades] = i
+                trade_type[n_trades] = 0
+                n_trades += 1
+                cash = 0.0
+
+        # Sell signal: QQQ price crosses below QQQ sell_level -> Sell TQQQ
+        elif position == 1 and sell_sig[i]:
+            if shares > 0:
+                cash = shares * tqqq[i]  # Sell TQQQ shares
+                position = 0
+                trade_idx[n_trades] = i
+                trade_type[n_trades] = 1
+                n_trades += 1
+                shares = 0.0
+
+        # Current portfolio value, branchless: exactly one of cash/shares
+        # is nonzero at any time, so the sum is always the held value
+        value = shares * tqqq[i] + cash
+        portfolio_values[i] = value
+
+        # Running-peak drawdown, folded into the same pass
+        if value > peak:
+            peak = value
+        dd = (value - peak) / peak
+        if dd < min_dd:
+            min_dd = dd
+
+    return portfolio_values, trade_idx[:n_trades], trade_type[:n_trades], min_dd
+
+def _run_strategy_vectorized(buy_sig, sell_sig, tqqq, start, initial_capital):
+    """
+    Vectorized equivalent of _run_strategy, used when numba is missing.
+
+    The two-threshold hysteresis is path-dependent per bar, but the held
+    position is just the last non-zero event (+1 enter / -1 exit) forward-
+    filled, which numpy can compute with a maximum.accumulate scan. Trades
+    fall out of np.diff on the position array; the equity curve is then
+    filled segment-by-segment (a few hundred segments, each a vectorized
+    slice) instead of bar-by-bar.
+    """
+    n = len(tqqq)
+
+    # Encode events and forward-fill the last non-zero one to get the
+    # position held on each bar (int8 - the scan only needs the sign)
+    events = np.where(buy_sig, np.int8(1), np.where(sell_sig, np.int8(-1), np.int8(0)))
+    events[:start] = 0
+    last_event_idx = np.where(events != 0, np.arange(n), 0)
+    np.maximum.accumulate(last_event_idx, out=last_event_idx)
+    pos = events[last_event_idx] == 1
+
+    # Position transitions are the trades: +1 = BUY, -1 = SELL
+    d = np.diff(pos.astype(np.int8), prepend=np.int8(0))
+    trade_idx = np.flatnonzero(d != 0).astype(np.int32)
+    trade_type = (d[trade_idx] == -1).astype(np.int8)
+
+    # Equity curve: flat segments carry cash, invested segments track TQQQ
+    portfolio_values = np.empty(n, dtype=np.float64)
+    cash = initial_capital
+    shares = 0.0
+    prev = 0
+    for k in range(len(trade_idx)):
+        i = trade_idx[k]
+        if trade_type[k] == 0:  # BUY at bar i
+            portfolio_values[prev:i] = cash
+            shares = cash / tqqq[i]
+        else:  # SELL at bar i
+            portfolio_values[prev:i] = shares * tqqq[prev:i]
+            cash = shares * tqqq[i]
+            shares = 0.0
+        prev = i
+    if shares > 0.0:
+        portfolio_values[prev:] = shares * tqqq[prev:]
+    else:
+        portfolio_values[prev:] = cash
+
+    peaks = np.maximum.accumulate(portfolio_values)
+    min_dd = float(((portfolio_values - peaks) / peaks).min())
+
+    return portfolio_values, trade_idx, trade_type, min_dd
+
+@njit(parallel=True, cache=True)
+def _run_strategy_many(qqq_f32, sma_f32, tqqq, buys, sells, start, initial_capital):
+    """
+    Sweep a whole grid of (buy_buffer, sell_buffer) configs in one call.
+
+    Each config runs the same per-bar state machine as _run_strategy, but
+    the outer config loop is a prange so the sweep threads across cores
+    with no process pool or pickling. Levels are derived per bar from the
+    shared float32 SMA, matching the single-config mask computation
+    bit-for-bit. Returns stacked per-config portfolio curves and trade
+    logs plus per-config trade counts.
+    """
+    n_cfg = len(buys)
+    n = len(tqqq)
+    portfolio_values = np.empty((n_cfg, n), dtype=np.float64)
+    trade_idx = np.empty((n_cfg, 2 * n), dtype=np.int32)
+    trade_type = np.empty((n_cfg, 2 * n), dtype=np.int8)
+    trade_count = np.zeros(n_cfg, dtype=np.int64)
+    max_dd = np.zeros(n_cfg, dtype=np.float64)
+
+    for k in prange(n_cfg):
+        buy_factor = np.float32(1.0 + buys[k])
+        sell_factor = np.float32(1.0 - sells[k])
+
+        position = 0
+        cash = initial_capital
+        shares = 0.0
+        m = 0
+        peak = initial_capital
+        min_dd = 0.0
+
+        portfolio_values[k, :start] = initial_capital
+        for i in range(start, n):
+            if position == 0 and qqq_f32[i] > sma_f32[i] * buy_factor:
+                if cash > 0:
+                    shares = cash / tqqq[i]
+                    position = 1
+                    trade_idx[k, m] = i
+                    trade_type[k, m] = 0
+                    m += 1
+                    cash = 0.0
+            elif position == 1 and qqq_f32[i] < sma_f32[i] * sell_factor:
+                if shares > 0:
+                    cash = shares * tqqq[i]
+                    position = 0
+                    trade_idx[k, m] = i
+                    trade_type[k, m] = 1
+                    m += 1
+                    shares = 0.0
+            value = shares * tqqq[i] + cash
+            portfolio_values[k, i] = value
+            if value > peak:
+                peak = value
+            dd = (value - peak) / peak
+            if dd < min_dd:
+                min_dd = dd
+        trade_count[k] = m
+        max_dd[k] = min_dd
+
+    return portfolio_values, trade_idx, trade_type, trade_count, max_dd
+
+@njit(_SMA_RUNNING_SIG, cache=True)
+def _sma_running(v, period):
+    """
+    SMA as a running-sum recurrence: s[i] = s[i-1] + v[i] - v[i-period].
+
+    One pass, O(1) extra memory - unlike the cumsum identity it needs no
+    full-length cumulative array. Works for any window length.
+    """
+    n = v.shape[0]
+    out = np.full(n, np.nan)
+    if n >= period:
+        s = 0.0
+        for i in range(period):
+            s += v[i]
+        out[period - 1] = s / period
+        for i in range(period, n):
+            s += v[i] - v[i - period]
+            out[i] = s / period
+    return out
+
 def calculate_sma(prices, period=200):
-    """Calculate Simple Moving Average"""
-    return prices.rolling(window=period).mean()
+    """
+    Calculate Simple Moving Average in a single O(N) pass.
+
+    Dispatches to a compiled running-sum kernel when numba is available,
+    otherwise uses the numpy cumulative-sum identity - either way, no
+    pandas rolling-window machinery. Accepts any array-like and returns a
+    raw numpy array with NaN for the first period-1 warm-up entries.
+    """
+    v = np.asarray(prices, dtype=np.float64)
+    if HAVE_NUMBA:
+        return _sma_running(v, period)
+    out = np.full_like(v, np.nan)
+    if len(v) >= period:
+        cs = np.cumsum(v)
+        out[period - 1:] = (cs[period - 1:] - np.concatenate(([0.0], cs[:-period]))) / period
+    return out
+
+# On-disk cache for Yahoo Finance downloads, keyed by (ticker, start, end).
+# Re-runs during strategy iteration read a local parquet instead of hitting
+# the network. Best-effort: if parquet support is missing we just download.
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'lrs_backtest')
+CACHE_TTL_SECONDS = 24 * 3600  # refresh still-growing ranges daily
+
+def _cache_load(ticker, start_date, end_date):
+    """Read a cached download, or None if absent/stale/unreadable"""
+    cache_path = os.path.join(CACHE_DIR, f"{ticker}_{start_date}_{end_date}.parquet")
+    if os.path.exists(cache_path):
+        # A range ending today (or later) still accumulates new bars, so
+        # honor a daily TTL on it; fully historical ranges never change
+        # and are cached indefinitely.
+        if end_date >= datetime.now().strftime('%Y-%m-%d'):
+            age = time.time() - os.path.getmtime(cache_path)
+            if age > CACHE_TTL_SECONDS:
+                return None
+        try:
+            return pd.read_parquet(cache_path)
+        except Exception:
+            pass  # unreadable cache entry - caller falls back to download
+    return None
+
+def _cache_store(df, ticker, start_date, end_date):
+    """Write a download to the cache; best-effort (e.g. pyarrow missing)"""
+    cache_path = os.path.join(CACHE_DIR, f"{ticker}_{start_date}_{end_date}.parquet")
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_parquet(cache_path)
+    except Exception:
+        pass
 
 def download_data(ticker, start_date, end_date):
-    """Download historical data from Yahoo Finance"""
+    """Download historical data from Yahoo Finance, cached to local parquet"""
+    df = _cache_load(ticker, start_date, end_date)
+    if df is not None:
+        print(f"Loading {ticker} data from cache ({start_date} to {end_date})...")
+        print(f"  -> Loaded {len(df)} days of data")
+        return df
+
     print(f"Downloading {ticker} data from {start_date} to {end_date}...")
     df = yf.download(ticker, start=start_date, end=end_date, progress=False)
     # Flatten MultiIndex columns if present (newer yfinance)
@@ -29,8 +307,44 @@ def download_data(ticker, start_date, end_date):
     df = df[['Close']].copy()
     df['Close'] = df['Close'].astype(float)
     print(f"  -> Downloaded {len(df)} days of data")
+
+    _cache_store(df, ticker, start_date, end_date)
     return df
 
+def download_many(tickers, start_date, end_date):
+    """
+    Download several tickers over the same range in one Yahoo request.
+
+    Cached tickers are read from disk; the misses go out together in a
+    single batched yf.download call - one HTTPS session and one JSON
+    decode instead of one per ticker. Returns {ticker: DataFrame}, each
+    with a 'Close' column and its non-trading days dropped.
+    """
+    frames = {}
+    missing = []
+    for ticker in tickers:
+        df = _cache_load(ticker, start_date, end_date)
+        if df is not None:
+            print(f"Loading {ticker} data from cache ({start_date} to {end_date})...")
+            print(f"  -> Loaded {len(df)} days of data")
+            frames[ticker] = df
+        else:
+            missing.append(ticker)
+
+    if missing:
+        print(f"Downloading {', '.join(missing)} data from {start_date} to {end_date}...")
+        raw = yf.download(missing, start=start_date, end=end_date,
+                          progress=False, group_by='ticker', threads=True)
+        for ticker in missing:
+            sub = raw[ticker] if isinstance(raw.columns, pd.MultiIndex) else raw
+            df = sub[['Close']].dropna().copy()
+            df['Close'] = df['Close'].astype(float)
+            print(f"  -> Downloaded {len(df)} days of {ticker} data")
+            _cache_store(df, ticker, start_date, end_date)
+            frames[ticker] = df
+
+    return frames
+
 def build_synthetic_tqqq(qqq_df, real_tqqq_df, irx_df):
     """
     Build a full TQQQ price series from 1999-2026.
@@ -58,23 +372,48 @@ def build_synthetic_tqqq(qqq_df, real_tqqq_df, irx_df):
     tqqq_daily_ret = tqqq_overlap.pct_change().fillna(0).values
     irx_vals = irx_overlap.values
 
-    best_spread = 0.0
-    lowest_error = float('inf')
-
     cum_real_final = np.prod(1 + tqqq_daily_ret)
+    daily_expense = 0.0095 / 252
 
-    for spread in np.linspace(0.0, 0.05, 501):
-        daily_borrow = (irx_vals / 100 + spread) * 2 / 252
-        daily_expense = 0.0095 / 252
-        daily_drag = daily_borrow + daily_expense
-        synth_ret = qqq_daily_ret * 3 - daily_drag
-
-        cum_synth_final = np.prod(1 + synth_ret)
-
-        error = abs(cum_synth_final - cum_real_final)
-        if error < lowest_error:
-            lowest_error = error
-            best_spread = spread
+    def cum_synth_final(spread):
+        daily_drag = (irx_vals / 100 + spread) * 2 / 252 + daily_expense
+        return np.prod(1 + qqq_daily_ret * 3 - daily_drag)
+
+    # A higher borrow spread strictly lowers the cumulative return, so the
+    # calibration error crosses zero at most once: a bracketed root-find
+    # gets the spread to machine precision in ~10 evaluations where the
+    # old grid needed 501 (and topped out at 1e-4 resolution).
+    err_lo = cum_synth_final(0.0) - cum_real_final
+    err_hi = cum_synth_final(0.05) - cum_real_final
+    if brentq is not None:
+        if err_lo <= 0:    # even zero spread undershoots real TQQQ
+            best_spread, lowest_error = 0.0, abs(err_lo)
+        elif err_hi >= 0:  # max spread still overshoots
+            best_spread, lowest_error = 0.05, abs(err_hi)
+        else:
+            best_spread = brentq(
+                lambda s: cum_synth_final(s) - cum_real_final,
+                0.0, 0.05, xtol=1e-6
+            )
+            lowest_error = abs(cum_synth_final(best_spread) - cum_real_final)
+    else:
+        # No scipy: evaluate the whole candidate grid in one broadcast -
+        # (501, 1) spreads against the (N,) overlap arrays, each row
+        # reduced to its final cumulative return. The grid only resolves
+        # spreads to 1e-4, well within float32, so the big (501, N)
+        # intermediate runs at half the bandwidth and twice the SIMD
+        # width; only the cumulative product reduces in float64 to avoid
+        # rounding drift across thousands of multiplies.
+        spreads = np.linspace(0.0, 0.05, 501, dtype=np.float32)
+        qqq_ret_f32 = qqq_daily_ret.astype(np.float32)
+        irx_f32 = irx_vals.astype(np.float32)
+        daily_drag = ((irx_f32[None, :] / 100 + spreads[:, None]) * np.float32(2 / 252)
+                      + np.float32(daily_expense))
+        synth_ret = qqq_ret_f32[None, :] * 3 - daily_drag
+        errors = np.abs(np.prod(1 + synth_ret, axis=1, dtype=np.float64) - cum_real_final)
+        best_i = int(np.argmin(errors))  # ties resolve to the lowest spread
+        best_spread = float(spreads[best_i])
+        lowest_error = float(errors[best_i])
 
     print(f"  Best spread: {best_spread*100:.2f}%")
     print(f"  Calibration error: {lowest_error*100:.2f}% (cumulative)")
@@ -84,30 +423,38 @@ def build_synthetic_tqqq(qqq_df, real_tqqq_df, irx_df):
     print("PHASE 2: Generating synthetic TQQQ from 1999")
     print("-" * 60)
 
-    qqq_ret = qqq_df['Close'].pct_change().fillna(0)
-    daily_borrow = (irx_aligned['Close'] / 100 + best_spread) * 2 / 252
+    # Daily returns written straight into a preallocated buffer, then one
+    # fused expression for the synthetic return stream - plain numpy, no
+    # pandas pct_change/alignment machinery on the full-length series
+    qqq_close = qqq_df['Close'].to_numpy(dtype=np.float64)
+    irx_np = irx_aligned['Close'].to_numpy(dtype=np.float64)
     daily_expense = 0.0095 / 252
-    daily_drag = daily_borrow + daily_expense
-    synth_ret = qqq_ret * 3 - daily_drag
+    ret = np.empty_like(qqq_close)
+    ret[0] = 0.0
+    np.divide(qqq_close[1:], qqq_close[:-1], out=ret[1:])
+    ret[1:] -= 1.0
+    synth_ret = ret * 3 - ((irx_np / 100 + best_spread) * 2 / 252 + daily_expense)
 
     # Forward-build synthetic prices from an arbitrary start, then rescale
-    synth_cumulative = (1 + synth_ret).cumprod()
-
-    # Scale so that on splice_date the synthetic matches real TQQQ's first price
+    # in place so that on splice_date the synthetic matches real TQQQ's
+    # first price
+    synth_cum = np.cumprod(1 + synth_ret)
     real_start_price = real_tqqq_df['Close'].iloc[0]
-    synth_at_splice = synth_cumulative.loc[splice_date]
-    scale = real_start_price / synth_at_splice
-    synth_prices = synth_cumulative * scale
+    synth_cum *= real_start_price / synth_cum[qqq_df.index.get_loc(splice_date)]
+    synth_prices = pd.Series(synth_cum, index=qqq_df.index)
 
-    # Stitch: use synthetic pre-2010, real post-2010
+    # Stitch: use synthetic pre-2010, real post-2010. The two pieces never
+    # overlap, so a plain array concat with a hand-built index skips the
+    # pd.concat alignment path (and the extra DataFrame copy on return).
     pre_splice = synth_prices[synth_prices.index < splice_date]
     post_splice = real_tqqq_df['Close']
-    full_tqqq = pd.concat([pre_splice, post_splice])
-    full_tqqq.name = 'Close'
+    full_idx = pre_splice.index.append(post_splice.index)
+    full_vals = np.concatenate([pre_splice.to_numpy(), post_splice.to_numpy()])
+    full_tqqq_df = pd.DataFrame({'Close': full_vals}, index=full_idx)
 
     print(f"  Synthetic period: {pre_splice.index[0].strftime('%Y-%m-%d')} to {pre_splice.index[-1].strftime('%Y-%m-%d')} ({len(pre_splice)} days)")
     print(f"  Real period:      {post_splice.index[0].strftime('%Y-%m-%d')} to {post_splice.index[-1].strftime('%Y-%m-%d')} ({len(post_splice)} days)")
-    print(f"  Total:            {len(full_tqqq)} days")
+    print(f"  Total:            {len(full_tqqq_df)} days")
     print(f"  Simulated TQQQ start price (1999): ${pre_splice.iloc[0]:.4f}")
     print(f"  Splice price (2010-02-11):          ${real_start_price:.4f}")
     print(f"  Current price:                      ${post_splice.iloc[-1]:.2f}")
@@ -115,132 +462,154 @@ def build_synthetic_tqqq(qqq_df, real_tqqq_df, irx_df):
     # Also return the pure synthetic series for validation
     synth_only_df = pd.DataFrame({'Close': synth_prices})
 
-    return pd.DataFrame({'Close': full_tqqq}), synth_only_df
+    return full_tqqq_df, synth_only_df
 
-def backtest_qqq_tqqq_strategy(qqq_df, tqqq_df, buy_buffer_pct, sell_buffer_pct, sma_period=200):
+def backtest_qqq_tqqq_strategy(qqq_df, tqqq_df, buy_buffer_pct, sell_buffer_pct,
+                               sma_period=200, qqq_sma=None):
     """
     Backtest the LRS strategy using QQQ signals to trade TQQQ
-    
+
+    Convenience wrapper: prepares the merged data and runs a single config.
+    When sweeping several buffer configs over the same data, call
+    prepare_data once and run_strategy per config instead.
+
     Parameters:
     - qqq_df: DataFrame with QQQ 'Close' prices
-    - tqqq_df: DataFrame with TQQQ 'Close' prices  
+    - tqqq_df: DataFrame with TQQQ 'Close' prices
     - buy_buffer_pct: Percentage above QQQ SMA to trigger buy
     - sell_buffer_pct: Percentage below QQQ SMA to trigger sell
     - sma_period: Period for SMA calculation (default 200)
+    - qqq_sma: optional precomputed SMA (see prepare_data)
     """
-    # Merge on dates
-    df = pd.concat([qqq_df['Close'], tqqq_df['Close']], axis=1, keys=['QQQ', 'TQQQ'])
-    
-    # Drop any NaN values from mismatched dates
-    df = df.dropna()
-    
-    # Calculate QQQ's 200 SMA and buffer levels
-    df['QQQ_SMA'] = calculate_sma(df['QQQ'], sma_period)
-    df['Buy_Level'] = df['QQQ_SMA'] * (1 + buy_buffer_pct)
-    df['Sell_Level'] = df['QQQ_SMA'] * (1 - sell_buffer_pct)
-    
-    # Extract values as arrays for faster, cleaner access
-    dates = df.index.values
-    qqq_vals = df['QQQ'].values
-    tqqq_vals = df['TQQQ'].values
-    qqq_sma_vals = df['QQQ_SMA'].values
-    buy_level_vals = df['Buy_Level'].values
-    sell_level_vals = df['Sell_Level'].values
-    
-    # Initialize position tracking
-    position = 0  # 0 = cash, 1 = invested in TQQQ
-    trades = []
-    entry_price = 0
-    
-    # Track portfolio value
+    prepared = prepare_data(qqq_df, tqqq_df, sma_period, qqq_sma)
+    return run_strategy(prepared, buy_buffer_pct, sell_buffer_pct)
+
+def prepare_data(qqq_df, tqqq_df, sma_period=200, qqq_sma=None):
+    """
+    Merge QQQ/TQQQ on dates and compute the QQQ SMA once.
+
+    This work is identical for every buffer config, so it is hoisted out of
+    the per-config path. Returns (dates, qqq_vals, tqqq_vals, qqq_sma_vals)
+    as contiguous float64 arrays plus the datetime64 index.
+
+    `qqq_sma` optionally carries an SMA precomputed over qqq_df's own
+    calendar (one array per qqq input), so callers backtesting the same QQQ
+    frame against several TQQQ series pay the rolling mean once. Only pass
+    it when the TQQQ series covers the same trading days as QQQ, otherwise
+    the window contents would differ from the aligned computation.
+    """
+    # Align on common trading days - a plain index intersection instead of
+    # building a merged DataFrame and scanning it for NaN rows
+    common_idx = qqq_df.index.intersection(tqqq_df.index)
+    qqq_vals = qqq_df['Close'].reindex(common_idx).to_numpy(dtype=np.float64, copy=False)
+    tqqq_vals = tqqq_df['Close'].reindex(common_idx).to_numpy(dtype=np.float64, copy=False)
+
+    # Drop any NaN values inside the overlap (same rows dropna() removed)
+    valid = ~(np.isnan(qqq_vals) | np.isnan(tqqq_vals))
+    if not valid.all():
+        common_idx = common_idx[valid]
+        qqq_vals = qqq_vals[valid]
+        tqqq_vals = tqqq_vals[valid]
+
+    # Calculate QQQ's 200 SMA (or pick the precomputed one by position)
+    if qqq_sma is None:
+        qqq_sma_vals = calculate_sma(qqq_vals, sma_period)
+    else:
+        qqq_sma_vals = np.asarray(qqq_sma, dtype=np.float64)[qqq_df.index.get_indexer(common_idx)]
+
+    dates = common_idx.values
+    return dates, qqq_vals, tqqq_vals, qqq_sma_vals
+
+def run_strategy(prepared, buy_buffer_pct, sell_buffer_pct):
+    """
+    Run one buffer config over data prepared by prepare_data.
+
+    Only the buffer levels and the trading loop are computed here; the
+    merge and SMA are shared across configs.
+    """
+    dates, qqq_vals, tqqq_vals, qqq_sma_vals = prepared
+
+    # Buffer levels around the SMA - plain numpy, no DataFrame columns.
+    # The levels only feed comparisons against cent-resolution prices, so
+    # float32 is plenty; halving the element size halves the bandwidth of
+    # the mask computation. Everything monetary stays float64.
+    qqq_f32 = qqq_vals.astype(np.float32)
+    sma_f32 = qqq_sma_vals.astype(np.float32)
+    buy_level_vals = sma_f32 * np.float32(1.0 + buy_buffer_pct)
+    sell_level_vals = sma_f32 * np.float32(1.0 - sell_buffer_pct)
+
     initial_capital = 10000
-    cash = initial_capital
-    shares = 0
-    portfolio_values = []
-    
-    for i in range(len(dates)):
-        if pd.isna(qqq_sma_vals[i]):
-            portfolio_values.append(initial_capital)
-            continue
-            
-        # Extract values as Python scalars to avoid numpy type issues
-        current_qqq = qqq_vals[i].item()
-        current_tqqq = tqqq_vals[i].item()
-        current_date = dates[i]
-        buy_level = buy_level_vals[i].item()
-        sell_level = sell_level_vals[i].item()
-        qqq_sma = qqq_sma_vals[i].item()
-        
-        # Buy signal: QQQ price crosses above QQQ buy_level → Buy TQQQ
-        if position == 0 and current_qqq > buy_level:
-            if cash > 0:
-                shares = cash / current_tqqq  # Buy TQQQ shares
-                entry_price = current_tqqq
-                position = 1
-                trades.append({
-                    'Date': current_date,
-                    'Type': 'BUY',
-                    'QQQ_Price': current_qqq,
-                    'QQQ_SMA': qqq_sma,
-                    'Buy_Level': buy_level,
-                    'TQQQ_Price': current_tqqq
-                })
-                cash = 0.0
-        
-        # Sell signal: QQQ price crosses below QQQ sell_level → Sell TQQQ
-        elif position == 1 and current_qqq < sell_level:
-            if shares > 0:
-                cash = shares * current_tqqq  # Sell TQQQ shares
-                pnl = ((current_tqqq - entry_price) / entry_price) * 100
-                position = 0
-                trades.append({
-                    'Date': current_date,
-                    'Type': 'SELL',
-                    'QQQ_Price': current_qqq,
-                    'QQQ_SMA': qqq_sma,
-                    'Sell_Level': sell_level,
-                    'TQQQ_Price': current_tqqq,
-                    'PnL_pct': pnl
-                })
-                shares = 0.0
-        
-        # Calculate current portfolio value
-        if position == 1:
-            portfolio_value = shares * current_tqqq
-        else:
-            portfolio_value = cash
-        
-        portfolio_values.append(portfolio_value)
-    
+
+    # Raw signals are pure elementwise comparisons - compute them once as
+    # bool masks so the loop only consults two packed arrays per bar.
+    # (NaN levels in the warm-up region compare False, so starting the loop
+    # at the first valid SMA bar is equivalent to the old isna check.)
+    buy_sig = np.greater(qqq_f32, buy_level_vals)
+    sell_sig = np.less(qqq_f32, sell_level_vals)
+    valid_sma = ~np.isnan(qqq_sma_vals)
+    sma_start = int(valid_sma.argmax()) if valid_sma.any() else len(tqqq_vals)
+
+    # Run the per-day loop in native code; without numba, use the
+    # vectorized state-machine path instead of interpreting it bar-by-bar
+    kernel = _run_strategy if HAVE_NUMBA else _run_strategy_vectorized
+    portfolio_values, trade_idx, trade_type, max_dd = kernel(
+        buy_sig, sell_sig, tqqq_vals, sma_start, float(initial_capital)
+    )
+
+    return _assemble_result(prepared, buy_buffer_pct, sell_buffer_pct,
+                            buy_level_vals, sell_level_vals,
+                            portfolio_values, trade_idx, trade_type, max_dd)
+
+def _assemble_result(prepared, buy_buffer_pct, sell_buffer_pct,
+                     buy_level_vals, sell_level_vals,
+                     portfolio_values, trade_idx, trade_type, max_dd):
+    """Build the metrics/result dict from a kernel's raw output arrays"""
+    dates, qqq_vals, tqqq_vals, qqq_sma_vals = prepared
+    initial_capital = 10000
+
+    # Trade log stays as parallel arrays (SoA): cache-friendly for the
+    # metrics pass below, converted to display form only when printed.
+    # Trades strictly alternate BUY/SELL starting with a BUY, so each
+    # sell's entry price is the matching element of the buy prices.
+    is_sell = trade_type == 1
+    trade_tqqq = tqqq_vals[trade_idx]
+    buy_px = trade_tqqq[~is_sell]
+    sell_px = trade_tqqq[is_sell]
+    trade_pnl = np.full(len(trade_idx), np.nan)
+    trade_pnl[is_sell] = ((sell_px - buy_px[:len(sell_px)]) / buy_px[:len(sell_px)]) * 100
+    trades = {
+        'date': dates[trade_idx],
+        'type': trade_type,  # 0=BUY, 1=SELL
+        'qqq': qqq_vals[trade_idx],
+        'sma': qqq_sma_vals[trade_idx],
+        'level': np.where(is_sell, sell_level_vals[trade_idx], buy_level_vals[trade_idx]),
+        'tqqq': trade_tqqq,
+        'pnl': trade_pnl,
+    }
+
     # Final portfolio value
-    if position == 1:
-        final_value = shares * tqqq_vals[-1].item()
-    else:
-        final_value = cash
-    
+    final_value = float(portfolio_values[-1])
+
     # Calculate metrics
     total_return = ((final_value - initial_capital) / initial_capital) * 100
     
-    # Calculate max drawdown
-    portfolio_series = pd.Series(portfolio_values, index=dates)
-    cummax = portfolio_series.cummax()
-    drawdown = (portfolio_series - cummax) / cummax * 100
-    max_drawdown = drawdown.min()
+    # Max drawdown was tracked inside the kernel; scale to percent here
+    max_drawdown = max_dd * 100
     
-    # Calculate winning trades
-    sell_trades = [t for t in trades if t['Type'] == 'SELL']
-    if sell_trades:
-        winning_trades = sum(1 for t in sell_trades if t.get('PnL_pct', 0) > 0)
-        win_rate = (winning_trades / len(sell_trades)) * 100
-        avg_win = float(np.mean([t['PnL_pct'] for t in sell_trades if t.get('PnL_pct', 0) > 0])) if winning_trades > 0 else 0.0
-        avg_loss = float(np.mean([t['PnL_pct'] for t in sell_trades if t.get('PnL_pct', 0) < 0])) if (len(sell_trades) - winning_trades) > 0 else 0.0
-    else:
-        win_rate = 0.0
-        avg_win = 0.0
-        avg_loss = 0.0
+    # Calculate winning trades - boolean-masked reductions on the SoA
+    # pnl column instead of a Python loop over trade records
+    sell_pnl = trades['pnl'][is_sell]
+    n_sells = len(sell_pnl)
+    wins = sell_pnl > 0
+    losses = sell_pnl < 0
+    n_win = int(wins.sum())
+    n_loss = int(losses.sum())
+    win_rate = (n_win / n_sells) * 100 if n_sells > 0 else 0.0
+    avg_win = float(sell_pnl[wins].mean()) if n_win > 0 else 0.0
+    avg_loss = float(sell_pnl[losses].mean()) if n_loss > 0 else 0.0
     
-    # Calculate CAGR
-    years = (pd.Timestamp(dates[-1]) - pd.Timestamp(dates[0])).days / 365.25
+    # Calculate CAGR - dates are already datetime64, no Timestamp objects
+    years = (dates[-1] - dates[0]) / np.timedelta64(1, 'D') / 365.25
     cagr = (((final_value / initial_capital) ** (1 / years)) - 1) * 100 if years > 0 else 0.0
     
     return {
@@ -249,16 +618,60 @@ def backtest_qqq_tqqq_strategy(qqq_df, tqqq_df, buy_buffer_pct, sell_buffer_pct,
         'total_return': total_return,
         'cagr': cagr,
         'max_drawdown': max_drawdown,
-        'num_trades': len(sell_trades),
+        'num_trades': n_sells,
         'win_rate': win_rate,
         'avg_win': avg_win,
         'avg_loss': avg_loss,
         'final_value': final_value,
         'trades': trades,
-        'portfolio_values': portfolio_series,
+        'portfolio_values': portfolio_values,  # raw numpy, aligned to 'dates'
         'years': years
     }
 
+def backtest_many(prepared, configs):
+    """
+    Sweep several buffer configs over one prepared dataset.
+
+    With numba, all configs run inside a single parallel kernel call
+    (threads via prange - no process pool, no pickling); otherwise each
+    config falls back to run_strategy. Results come back in config order
+    with each config's 'name' attached.
+    """
+    if not HAVE_NUMBA:
+        results = []
+        for config in configs:
+            result = run_strategy(prepared, config['buy'], config['sell'])
+            result['name'] = config['name']
+            results.append(result)
+        return results
+
+    dates, qqq_vals, tqqq_vals, qqq_sma_vals = prepared
+    qqq_f32 = qqq_vals.astype(np.float32)
+    sma_f32 = qqq_sma_vals.astype(np.float32)
+    buys = np.array([c['buy'] for c in configs], dtype=np.float64)
+    sells = np.array([c['sell'] for c in configs], dtype=np.float64)
+    valid_sma = ~np.isnan(qqq_sma_vals)
+    sma_start = int(valid_sma.argmax()) if valid_sma.any() else len(tqqq_vals)
+
+    portfolio_values, trade_idx, trade_type, trade_count, max_dd = _run_strategy_many(
+        qqq_f32, sma_f32, tqqq_vals, buys, sells, sma_start, 10000.0
+    )
+
+    results = []
+    for k, config in enumerate(configs):
+        buy_level_vals = sma_f32 * np.float32(1.0 + config['buy'])
+        sell_level_vals = sma_f32 * np.float32(1.0 - config['sell'])
+        m = trade_count[k]
+        result = _assemble_result(
+            prepared, config['buy'], config['sell'],
+            buy_level_vals, sell_level_vals,
+            portfolio_values[k], trade_idx[k, :m].copy(), trade_type[k, :m].copy(),
+            float(max_dd[k])
+        )
+        result['name'] = config['name']
+        results.append(result)
+    return results
+
 def main():
     print("=" * 80)
     print("TQQQ Strategy Backtest - Simulated (1999) + Real (2010) Data")
@@ -268,10 +681,12 @@ def main():
     end_date = datetime.now().strftime('%Y-%m-%d')
     qqq_start = '1999-03-10'  # QQQ inception
 
-    # Download data
+    # Download data - QQQ and TQQQ share one batched request; TQQQ's rows
+    # before its 2010-02-11 inception simply don't exist and drop out
     print("Downloading historical data from Yahoo Finance...")
-    qqq_df = download_data('QQQ', qqq_start, end_date)
-    real_tqqq_df = download_data('TQQQ', '2010-02-11', end_date)
+    frames = download_many(['QQQ', 'TQQQ'], qqq_start, end_date)
+    qqq_df = frames['QQQ']
+    real_tqqq_df = frames['TQQQ']
     irx_df = download_data('^IRX', qqq_start, end_date)  # 13-week T-bill for borrow cost
     print()
 
@@ -283,13 +698,17 @@ def main():
     print(f"Backtest Period: {qqq_df.index[0].strftime('%Y-%m-%d')} to {qqq_df.index[-1].strftime('%Y-%m-%d')}")
     print(f"Total Trading Days: {len(qqq_df)}")
     print()
-    print(f"QQQ Starting Price:  ${qqq_df['Close'].iloc[0].item():.2f}")
-    print(f"QQQ Ending Price:    ${qqq_df['Close'].iloc[-1].item():.2f}")
-    print(f"QQQ Buy & Hold Return: {((qqq_df['Close'].iloc[-1].item() / qqq_df['Close'].iloc[0].item()) - 1) * 100:.2f}%")
+    # Endpoint prices read once from the raw arrays - no per-scalar
+    # pandas .iloc indexer round-trips
+    qqq_close = qqq_df['Close'].to_numpy()
+    tqqq_close = tqqq_df['Close'].to_numpy()
+    print(f"QQQ Starting Price:  ${qqq_close[0]:.2f}")
+    print(f"QQQ Ending Price:    ${qqq_close[-1]:.2f}")
+    print(f"QQQ Buy & Hold Return: {((qqq_close[-1] / qqq_close[0]) - 1) * 100:.2f}%")
     print()
-    print(f"TQQQ Sim Start Price (1999): ${tqqq_df['Close'].iloc[0]:.4f}")
-    print(f"TQQQ Ending Price:           ${tqqq_df['Close'].iloc[-1]:.2f}")
-    tqqq_bh_return = ((tqqq_df['Close'].iloc[-1] / tqqq_df['Close'].iloc[0]) - 1) * 100
+    print(f"TQQQ Sim Start Price (1999): ${tqqq_close[0]:.4f}")
+    print(f"TQQQ Ending Price:           ${tqqq_close[-1]:.2f}")
+    tqqq_bh_return = ((tqqq_close[-1] / tqqq_close[0]) - 1) * 100
     print(f"TQQQ Buy & Hold Return:      {tqqq_bh_return:.2f}%")
     print()
 
@@ -301,8 +720,9 @@ def main():
     print("=" * 90)
     print()
 
-    # QQQ from 2010 onward (need pre-2010 for SMA warmup, so use full QQQ)
-    qqq_2010 = download_data('QQQ', '2010-02-11', end_date)
+    # QQQ from 2010 onward - a slice of the full history already in
+    # memory, no second download round-trip
+    qqq_2010 = qqq_df.loc['2010-02-11':]
 
     # Synthetic-only TQQQ for the 2010+ period
     synth_2010 = synth_only_df.loc['2010-02-11':]
@@ -315,21 +735,15 @@ def main():
         {'buy': 0.00, 'sell': 0.00, 'name': '0% (No Buffer)'},
     ]
 
-    real_results = []
-    synth_results = []
-    for vc in validation_configs:
-        r_real = backtest_qqq_tqqq_strategy(
-            qqq_2010, real_tqqq_df,
-            buy_buffer_pct=vc['buy'], sell_buffer_pct=vc['sell']
-        )
-        r_synth = backtest_qqq_tqqq_strategy(
-            qqq_2010, synth_2010,
-            buy_buffer_pct=vc['buy'], sell_buffer_pct=vc['sell']
-        )
-        r_real['name'] = vc['name']
-        r_synth['name'] = vc['name']
-        real_results.append(r_real)
-        synth_results.append(r_synth)
+    # Prepare each dataset once; only the buffer levels vary per config.
+    # Each sweep is one batched kernel call that threads across configs.
+    # Both sweeps read the same QQQ frame, so its SMA is computed once
+    # and shared (real and synthetic TQQQ cover the same trading days).
+    qqq_sma_2010 = calculate_sma(qqq_2010['Close'].to_numpy(dtype=np.float64))
+    real_results = backtest_many(prepare_data(qqq_2010, real_tqqq_df, qqq_sma=qqq_sma_2010),
+                                 validation_configs)
+    synth_results = backtest_many(prepare_data(qqq_2010, synth_2010, qqq_sma=qqq_sma_2010),
+                                  validation_configs)
 
     print(f"{'Strategy':<22} | {'--- Real TQQQ ---':^30} | {'--- Synthetic TQQQ ---':^30} | {'Return Diff':>12}")
     print(f"{'':22} | {'Return':>12} {'CAGR':>8} {'Max DD':>8} | {'Return':>12} {'CAGR':>8} {'Max DD':>8} |")
@@ -364,33 +778,31 @@ def main():
         {'buy': 0.00, 'sell': 0.00, 'name': '0% Buy / 0% Sell (No Buffer)'},
     ]
 
-    results = []
-    for config in configs:
-        result = backtest_qqq_tqqq_strategy(
-            qqq_df, tqqq_df,
-            buy_buffer_pct=config['buy'],
-            sell_buffer_pct=config['sell']
-        )
-        result['name'] = config['name']
-        results.append(result)
+    # Merge + SMA computed once, shared by all configs; the whole sweep is
+    # a single parallel kernel call
+    results = backtest_many(prepare_data(qqq_df, tqqq_df), configs)
 
-    # Buy & Hold benchmarks (invest $10k on day 1, hold to end)
+    # Buy & Hold benchmarks (invest $10k on day 1, hold to end) - endpoint
+    # prices come from the arrays extracted above
     initial_capital = 10000
-    tqqq_start_px = tqqq_df['Close'].iloc[0]
-    tqqq_end_px = tqqq_df['Close'].iloc[-1]
+    tqqq_start_px = float(tqqq_close[0])
+    tqqq_end_px = float(tqqq_close[-1])
     tqqq_bh_final = initial_capital * (tqqq_end_px / tqqq_start_px)
     tqqq_bh_return = ((tqqq_end_px / tqqq_start_px) - 1) * 100
-    years_total = (tqqq_df.index[-1] - tqqq_df.index[0]).days / 365.25
+    tqqq_dates = tqqq_df.index.values
+    years_total = (tqqq_dates[-1] - tqqq_dates[0]) / np.timedelta64(1, 'D') / 365.25
     tqqq_bh_cagr = (((tqqq_end_px / tqqq_start_px) ** (1 / years_total)) - 1) * 100
 
-    qqq_start_px = qqq_df['Close'].iloc[0].item()
-    qqq_end_px = qqq_df['Close'].iloc[-1].item()
+    qqq_start_px = float(qqq_close[0])
+    qqq_end_px = float(qqq_close[-1])
     qqq_bh_final = initial_capital * (qqq_end_px / qqq_start_px)
     qqq_bh_return = ((qqq_end_px / qqq_start_px) - 1) * 100
     qqq_bh_cagr = (((qqq_end_px / qqq_start_px) ** (1 / years_total)) - 1) * 100
 
     # Sort results by total return descending
-    results.sort(key=lambda x: x['total_return'], reverse=True)
+    returns = np.fromiter((r['total_return'] for r in results), dtype=np.float64)
+    order = np.argsort(-returns, kind='stable')  # descending, ties keep config order
+    results = [results[i] for i in order]
 
     # Display results
     print("=" * 95)
@@ -432,7 +844,7 @@ def main():
         print()
 
     # Winner
-    best = results[0]  # already sorted
+    best = results[0]  # results are in descending-return order
     print("=" * 80)
     print("WINNER")
     print("=" * 80)
@@ -449,15 +861,21 @@ def main():
     print("=" * 80)
     print()
 
-    recent_trades = best['trades'][-20:]
-    for trade in recent_trades:
-        date_str = pd.Timestamp(trade['Date']).strftime('%Y-%m-%d')
-        if trade['Type'] == 'BUY':
-            print(f"  {date_str}: BUY  TQQQ @ ${trade['TQQQ_Price']:.2f}")
-            print(f"             (QQQ ${trade['QQQ_Price']:.2f} > Buy Level ${trade['Buy_Level']:.2f})")
+    # Trades are stored as parallel arrays; build display dicts only for
+    # the slice actually printed
+    tr = best['trades']
+    n_tr = len(tr['type'])
+    first_shown = max(0, n_tr - 20)
+    # Trade dates are raw datetime64; format the printed slice in one batch
+    date_strs = pd.to_datetime(tr['date'][first_shown:]).strftime('%Y-%m-%d')
+    for k in range(first_shown, n_tr):
+        date_str = date_strs[k - first_shown]
+        if tr['type'][k] == 0:
+            print(f"  {date_str}: BUY  TQQQ @ ${tr['tqqq'][k]:.2f}")
+            print(f"             (QQQ ${tr['qqq'][k]:.2f} > Buy Level ${tr['level'][k]:.2f})")
         else:
-            print(f"  {date_str}: SELL TQQQ @ ${trade['TQQQ_Price']:.2f} (P/L: {trade['PnL_pct']:+.2f}%)")
-            print(f"             (QQQ ${trade['QQQ_Price']:.2f} < Sell Level ${trade['Sell_Level']:.2f})")
+            print(f"  {date_str}: SELL TQQQ @ ${tr['tqqq'][k]:.2f} (P/L: {tr['pnl'][k]:+.2f}%)")
+            print(f"             (QQQ ${tr['qqq'][k]:.2f} < Sell Level ${tr['level'][k]:.2f})")
         print()
 
     print("=" * 80)
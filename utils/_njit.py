@@ -0,0 +1,24 @@
+"""
+Thin shim around numba's njit/prange.
+
+Numba is optional: if it is installed the decorated hot loops compile to
+native code (and cache to disk), otherwise the same functions run as plain
+Python with no code changes elsewhere.
+"""
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """No-op replacement for numba.njit when numba is not installed."""
+        if args and callable(args[0]):
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
+
+    prange = range